@@ -3,6 +3,9 @@
 """
 动态构建脚本
 根据 Git 标签自动添加版本号到输出文件名
+
+默认复用 build/ 下的 PyInstaller 缓存进行增量构建，
+使用 --rebuild 参数可清空缓存后完整重新构建
 """
 
 import sys
@@ -70,13 +73,25 @@ if __name__ == '__main__':
 
     print(f"✅ 已生成构建配置: {temp_spec}")
 
-    # 调用 PyInstaller
-    import os
-    os.system(f'pyinstaller --clean {temp_spec}')
+    # 调用 PyInstaller（缓存目录固定，便于增量构建和 CI 缓存）
+    command = [
+        sys.executable, '-m', 'PyInstaller',
+        '--workpath', 'build',
+        '--distpath', 'dist',
+    ]
+    if '--rebuild' in sys.argv:
+        command.append('--clean')
+    command.append(str(temp_spec))
 
-    # 清理临时文件
-    if temp_spec.exists():
-        temp_spec.unlink()
+    try:
+        subprocess.run(command, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ 构建失败 (退出码 {e.returncode})")
+        sys.exit(e.returncode)
+    finally:
+        # 清理临时文件
+        if temp_spec.exists():
+            temp_spec.unlink()
 
     print()
     print("=" * 50)
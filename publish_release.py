@@ -15,22 +15,52 @@ GitHub Release 自动发布脚本
 可选参数：
 - --version VERSION: 指定版本号（默认从 Git 标签获取）
 - --repo REPO: 指定仓库名（默认从 git remote 获取）
+- --parallel-uploads N: 并发上传的线程数（默认 8）
 """
 
 import os
 import sys
+import logging
 import subprocess
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 try:
-    from github import Github
+    from github import Github, GithubException, GithubRetry
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
 except ImportError:
     print("❌ 缺少 PyGithub 库，请安装:")
     print("   pip install PyGithub")
     sys.exit(1)
 
 
+logger = logging.getLogger('publish_release')
+
+
+# 解析 remote URL 获取 owner/repo
+# 支持 HTTPS: https://github.com/owner/repo.git
+# 支持 SSH: git@github.com:owner/repo.git
+REMOTE_URL_PATTERNS = [
+    re.compile(r'github\.com[/:]([^/]+)/([^/]+?)(?:\.git)?$'),  # HTTPS or SSH
+    re.compile(r'github\.com/([^/]+)/([^/]+)'),  # HTTPS without .git
+]
+
+# 从文件名提取版本号: GeminiWatermarkRemover_1.0.1.exe
+BUILT_VERSION_PATTERN = re.compile(r'GeminiWatermarkRemover_([\d.]+)\.exe$')
+
+# 默认并发上传线程数（过高会触发 GitHub 限流）
+MAX_UPLOAD_WORKERS = 8
+# 单个文件上传的最大尝试次数
+UPLOAD_ATTEMPTS = 3
+
+# GitHub API 请求的重试策略（GithubRetry 额外处理 403/429 二级限流）、超时与连接池大小
+API_RETRY = GithubRetry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+API_TIMEOUT = 30
+API_POOL_SIZE = 16
+
+
 def get_git_tag():
     """从 Git 获取当前标签"""
     try:
@@ -60,16 +90,8 @@ def get_git_remote_url():
         )
         url = result.stdout.strip()
 
-        # 解析 URL 获取 owner/repo
-        # 支持 HTTPS: https://github.com/owner/repo.git
-        # 支持 SSH: git@github.com:owner/repo.git
-        patterns = [
-            r'github\.com[/:]([^/]+)/([^/]+?)(?:\.git)?$',  # HTTPS or SSH
-            r'github\.com/([^/]+)/([^/]+)',  # HTTPS without .git
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, url)
+        for pattern in REMOTE_URL_PATTERNS:
+            match = pattern.search(url)
             if match:
                 owner = match.group(1)
                 repo = match.group(2)
@@ -89,26 +111,33 @@ def get_release_notes(version):
     content = readme_path.read_text(encoding='utf-8')
 
     # 查找对应的版本更新日志
-    # 匹配 ### v1.0.1 (2026-01-11) 到下一个 ### 之间的内容
-    pattern = rf'### {re.escape(version)}.*?\n(.*?)(?=\n### v|\Z)'
-    match = re.search(pattern, content, re.DOTALL)
+    # 截取 ### v1.0.1 (2026-01-11) 标题行之后到下一个 ### v 之间的内容
+    start = content.find(f'### {version}')
+    if start < 0:
+        return None
 
-    if match:
-        notes = match.group(1).strip()
-        return f"## 📝 更新日志\n\n{notes}"
+    start = content.find('\n', start)
+    if start < 0:
+        return None
+    start += 1
 
-    return None
+    end = content.find('\n### v', start)
+    notes = content[start:end if end >= 0 else None].strip()
+    return f"## 📝 更新日志\n\n{notes}"
 
 
 # 解析命令行参数
 VERSION = None
 REPO_NAME = None
+PARALLEL_UPLOADS = MAX_UPLOAD_WORKERS
 
 for i, arg in enumerate(sys.argv[1:], 1):
     if arg == '--version' and i + 1 < len(sys.argv):
         VERSION = sys.argv[i + 1]
     elif arg == '--repo' and i + 1 < len(sys.argv):
         REPO_NAME = sys.argv[i + 1]
+    elif arg == '--parallel-uploads' and i + 1 < len(sys.argv):
+        PARALLEL_UPLOADS = max(1, int(sys.argv[i + 1]))
 
 # 如果没有指定，自动获取
 if not VERSION:
@@ -163,17 +192,13 @@ def get_built_version():
     if not dist_dir.exists():
         return None
 
-    # 查找 exe 文件
-    exe_files = list(dist_dir.glob("GeminiWatermarkRemover_*.exe"))
-    if not exe_files:
-        return None
-
-    # 从文件名提取版本号: GeminiWatermarkRemover_1.0.1.exe
-    import re
-    for exe in exe_files:
-        match = re.search(r'GeminiWatermarkRemover_([\d.]+)\.exe$', exe.name)
-        if match:
-            return match.group(1)
+    # 单次遍历目录，找到第一个匹配的 exe 文件即返回
+    with os.scandir(dist_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith('GeminiWatermarkRemover_') and entry.name.endswith('.exe'):
+                match = BUILT_VERSION_PATTERN.search(entry.name)
+                if match:
+                    return match.group(1)
 
     return None
 
@@ -219,6 +244,42 @@ def build_executable():
     print("✅ 构建成功")
 
 
+def is_transient_error(error):
+    """判断上传错误是否为可重试的临时错误（服务器 5xx 或网络连接问题）"""
+    if isinstance(error, GithubException):
+        return error.status is not None and error.status >= 500
+    return isinstance(error, (RequestsConnectionError, Timeout))
+
+
+def delete_leftover_asset(release, name):
+    """删除上传失败后可能残留的同名附件，避免重试时报 already_exists"""
+    for asset in release.get_assets():
+        if asset.name == name:
+            asset.delete_asset()
+            logger.info(f"已删除残留的附件: {name}")
+            return
+
+
+def upload_release_asset(release, exe_file):
+    """上传单个安装包，临时错误时按指数退避重试"""
+    for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+        try:
+            # 按路径上传，由 PyGithub 直接从磁盘流式读取，避免整个文件读入内存
+            return release.upload_asset(
+                str(exe_file),
+                name=exe_file.name,
+                content_type='application/x-msdownload'
+            )
+        except Exception as e:
+            # 认证失败、资源不存在等 4xx 错误重试也不会成功
+            if attempt == UPLOAD_ATTEMPTS or not is_transient_error(e):
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️  上传失败 ({exe_file.name}): {e}，{delay} 秒后重试...")
+            time.sleep(delay)
+            delete_leftover_asset(release, exe_file.name)
+
+
 def create_github_release():
     """创建 GitHub Release"""
 
@@ -238,7 +299,13 @@ def create_github_release():
     print()
 
     try:
-        g = Github(token)
+        # 连接池大小不小于上传线程数，保证并发上传时复用连接
+        g = Github(
+            token,
+            retry=API_RETRY,
+            timeout=API_TIMEOUT,
+            pool_size=max(API_POOL_SIZE, PARALLEL_UPLOADS)
+        )
         repo = g.get_repo(REPO_NAME)
 
         print(f"✅ 成功连接到仓库: {REPO_NAME}")
@@ -286,16 +353,17 @@ def create_github_release():
             print(f"   请先运行 build_installer.bat 构建安装包")
             return
 
-        # 上传安装包
-        for exe_file in exe_files:
-            print(f"📤 正在上传: {exe_file.name}")
-            with open(exe_file, 'rb') as f:
-                release.upload_asset(
-                    f.name,
-                    f.read(),
-                    content_type='application/x-msdownload'
-                )
-            print(f"✅ 上传成功: {exe_file.name}")
+        # 并发上传安装包
+        max_workers = min(PARALLEL_UPLOADS, len(exe_files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for exe_file in exe_files:
+                print(f"📤 正在上传: {exe_file.name}")
+                futures[executor.submit(upload_release_asset, release, exe_file)] = exe_file
+
+            for future in as_completed(futures):
+                future.result()
+                print(f"✅ 上传成功: {futures[future].name}")
 
         print()
         print("=" * 50)
@@ -304,13 +372,13 @@ def create_github_release():
         print("=" * 50)
 
     except Exception as e:
-        print(f"❌ 错误: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ 发布失败: {e}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     print("=" * 50)
     print("  GitHub Release 自动发布工具")
     print("=" * 50)
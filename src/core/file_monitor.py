@@ -7,19 +7,24 @@
 """
 
 import os
+import errno
 import logging
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict
 from datetime import datetime
-from PySide6.QtCore import QObject, Signal, QThread, QMutex, QTimer
+from PySide6.QtCore import QObject, Signal, QThread, QTimer
 
 try:
     from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler, FileCreatedEvent, FileMovedEvent
+    from watchdog.events import PatternMatchingEventHandler, FileCreatedEvent, FileMovedEvent
+    from watchdog.utils.patterns import match_any_paths
 except ImportError:
     Observer = None
-    FileSystemEventHandler = object
+    match_any_paths = None
+    PatternMatchingEventHandler = object
     FileCreatedEvent = None
     FileMovedEvent = None
 
@@ -31,93 +36,108 @@ logger = logging.getLogger('GeminiWatermarkRemover.file_monitor')
 ARCHIVE_FOLDER_NAME = "Gemini Watermark Remover Archive"
 FILE_PREFIX = "Gemini_Generated_Image"
 IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif'}
+# 元组形式，供 str.endswith 一次性匹配所有扩展名
+_EXT_TUPLE = tuple(sorted(IMAGE_EXTENSIONS))
 
+# watchdog 层面的文件名过滤，无关文件的事件不会进入 Python 回调
+WATCH_PATTERNS = [f"{FILE_PREFIX}*{ext}" for ext in sorted(IMAGE_EXTENSIONS)]
+IGNORE_PATTERNS = [f"*/{ARCHIVE_FOLDER_NAME}/*", "*_no_watermark*", "Clean_*"]
 
-class GeminiFileHandler(FileSystemEventHandler):
+
+class GeminiFileHandler(PatternMatchingEventHandler):
     """Gemini 文件创建事件处理器"""
 
     def __init__(self, callback: Callable[[str], None], status_callback: Callable[[str], None] = None, delay_seconds: float = 2.0):
-        super().__init__()
+        super().__init__(
+            patterns=WATCH_PATTERNS,
+            ignore_patterns=IGNORE_PATTERNS,
+            ignore_directories=True
+        )
         self.callback = callback
         self.status_callback = status_callback
         self.delay_seconds = delay_seconds
-        self.pending_files = {}
-        self.mutex = QMutex()
+        self.pending_files: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
 
     def on_created(self, event):
         """文件创建事件"""
-        if event.is_directory:
-            return
-
         file_path = event.src_path
-        path_obj = Path(file_path)
+        name = os.path.basename(file_path)
 
-        # 调试：记录所有文件创建事件
-        msg = f"创建文件: {path_obj.name}"
-        logger.info(msg)
-        if self.status_callback:
-            self.status_callback(msg)
-
-        # 检查文件扩展名
-        if path_obj.suffix.lower() not in IMAGE_EXTENSIONS:
+        # 检查文件名前缀和扩展名
+        if not name.startswith(FILE_PREFIX) or not name.lower().endswith(_EXT_TUPLE):
             return
 
-        # 检查文件名前缀
-        if not path_obj.name.startswith(FILE_PREFIX):
-            return
-
-        msg = f"✓ 匹配 Gemini 图片: {path_obj.name}"
+        msg = f"✓ 匹配 Gemini 图片: {name}"
         logger.info(msg)
         if self.status_callback:
             self.status_callback(msg)
 
-        # 使用定时器延迟处理，确保文件写入完成
-        import threading
-        timer = threading.Timer(self.delay_seconds, self._process_file, args=[file_path])
-        timer.start()
+        # 延迟处理，确保文件写入完成
+        self._schedule(file_path)
 
     def on_moved(self, event):
         """文件移动/重命名事件"""
-        if event.is_directory:
-            return
-
         # 检查目标路径（重命名后的路径）
+        # 只要源路径或目标路径之一匹配，watchdog 就会分发事件，因此仍需检查目标路径
+        # （例如原始文件被移入归档目录时，源路径匹配但目标路径应被忽略）
         dest_path = event.dest_path
-        path_obj = Path(dest_path)
-
-        # 调试：记录所有文件移动事件
-        msg = f"重命名: {Path(event.src_path).name} -> {path_obj.name}"
-        logger.info(msg)
-        if self.status_callback:
-            self.status_callback(msg)
-
-        # 检查文件扩展名
-        if path_obj.suffix.lower() not in IMAGE_EXTENSIONS:
+        if not match_any_paths(
+            [dest_path],
+            included_patterns=self.patterns,
+            excluded_patterns=self.ignore_patterns,
+            case_sensitive=self.case_sensitive
+        ):
             return
 
-        # 检查文件名前缀
-        if not path_obj.name.startswith(FILE_PREFIX):
+        name = os.path.basename(dest_path)
+
+        # 检查文件名前缀和扩展名
+        if not name.startswith(FILE_PREFIX) or not name.lower().endswith(_EXT_TUPLE):
             return
 
-        msg = f"✓ 匹配 Gemini 图片: {path_obj.name}"
+        msg = f"✓ 匹配 Gemini 图片: {name}"
         logger.info(msg)
         if self.status_callback:
             self.status_callback(msg)
 
-        # 使用定时器延迟处理，确保文件操作完成
-        import threading
-        timer = threading.Timer(self.delay_seconds, self._process_file, args=[dest_path])
-        timer.start()
+        # 延迟处理，确保文件操作完成
+        self._schedule(dest_path)
+
+    def _schedule(self, file_path: str):
+        """为文件安排延迟处理
+
+        同一文件的多次事件（创建、重命名等）只保留最后一次的定时器，
+        避免重复处理
+        """
+        with self._lock:
+            timer = self.pending_files.pop(file_path, None)
+            if timer:
+                timer.cancel()
+
+            timer = threading.Timer(self.delay_seconds, self._fire, args=[file_path])
+            timer.daemon = True
+            self.pending_files[file_path] = timer
+            timer.start()
+
+    def _fire(self, file_path: str):
+        """定时器到期"""
+        with self._lock:
+            self.pending_files.pop(file_path, None)
+
+        self._process_file(file_path)
 
     def _process_file(self, file_path: str):
         """处理文件（在延迟后调用）"""
         try:
-            # 再次检查文件是否存在且大小大于0
-            if not os.path.exists(file_path):
+            # 再次检查文件是否存在且大小大于0（单次 stat）
+            try:
+                file_size = os.stat(file_path).st_size
+            except OSError:
                 logger.warning(f"文件不存在，跳过: {file_path}")
                 return
 
-            if os.path.getsize(file_path) == 0:
+            if file_size == 0:
                 logger.warning(f"文件大小为0，跳过: {file_path}")
                 return
 
@@ -133,58 +153,68 @@ class FileMonitorThread(QThread):
 
     status = Signal(str)
     file_processed = Signal(str, str)  # 原始路径, 处理后路径
+    file_processed_named = Signal(str, str)  # 原始文件名, 处理后文件名
     error = Signal(str)
     monitoring_started = Signal(str)
     monitoring_stopped = Signal()
 
+    # PNG 压缩级别：1 为 zlib 最快档，体积远小于不压缩且几乎不增加 CPU 开销
+    PNG_COMPRESS_LEVEL = 1
+
     def __init__(self, watch_dir: str, output_dir: Optional[str] = None):
         super().__init__()
         self.watch_dir = watch_dir
         self.output_dir = output_dir
-        self.is_running = False
         self.observer = None
-        self.mutex = QMutex()
+        self._stop_event = threading.Event()
 
         # 水印移除器
         self.remover = GeminiWatermarkRemover()
         self.remover.status.connect(self.status.emit)
         self.remover.error.connect(self.error.emit)
 
-        # 创建归档目录
+        # 归档目录（在监控线程启动后创建）
         self.archive_dir = Path(watch_dir) / ARCHIVE_FOLDER_NAME
-        self.archive_dir.mkdir(exist_ok=True)
 
         # 处理队列（防止重复处理）
         self.processed_files = set()
-        self.processing_mutex = QMutex()
+        self._processed_lock = threading.Lock()
+
+        # 处理线程池：多个文件接连下载完成时可并行处理
+        workers = max(1, int(os.getenv('GWR_WORKERS', '2')))
+        self._pool = ThreadPoolExecutor(max_workers=workers)
 
-    def _is_file_processed(self, file_path: str) -> bool:
-        """检查文件是否已处理"""
-        self.processing_mutex.lock()
-        result = file_path in self.processed_files
-        self.processing_mutex.unlock()
-        return result
+    def _claim(self, file_path: str) -> bool:
+        """认领文件进行处理
 
-    def _mark_file_processed(self, file_path: str):
-        """标记文件为已处理"""
-        self.processing_mutex.lock()
-        self.processed_files.add(file_path)
-        self.processing_mutex.unlock()
+        Returns:
+            文件未处理过时标记并返回 True，已处理过返回 False
+        """
+        with self._processed_lock:
+            if file_path in self.processed_files:
+                return False
+            self.processed_files.add(file_path)
+            return True
 
     def _handle_new_file(self, file_path: str):
-        """处理新发现的文件"""
-        try:
-            # 检查是否已处理
-            if self._is_file_processed(file_path):
-                logger.debug(f"文件已处理，跳过: {file_path}")
-                return
+        """处理新发现的文件（提交到线程池）"""
+        if self._stop_event.is_set():
+            return
+
+        self._pool.submit(self._process_one, file_path)
 
+    def _process_one(self, file_path: str):
+        """移除单个文件的水印并归档原始文件"""
+        try:
             # 跳过已经处理过的文件（避免死循环）
             if '_no_watermark' in file_path:
                 logger.debug(f"跳过已处理的文件: {file_path}")
                 return
 
-            self._mark_file_processed(file_path)
+            # 检查是否已处理
+            if not self._claim(file_path):
+                logger.debug(f"文件已处理，跳过: {file_path}")
+                return
 
             # 获取文件信息
             file_path_obj = Path(file_path)
@@ -207,35 +237,45 @@ class FileMonitorThread(QThread):
             # 移除水印
             self.status.emit(f"正在处理: {filename}")
 
-            # 使用 remover 处理文件
+            # 读取图片数据后立即释放文件句柄
             with Image.open(file_path) as img:
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                img.load()
 
-                # 移除水印
-                result_img = self.remover.remove_from_image(img)
+            # 移除水印（模式转换由 remove_from_pil 统一处理）
+            result_img = self.remover.remove_from_pil(img)
 
-                # 保存为 PNG（无损，质量最高）
-                result_img.save(output_path, 'PNG', compress_level=0)
+            # 保存为 PNG（无损，质量最高）
+            result_img.save(output_path, 'PNG', compress_level=self.PNG_COMPRESS_LEVEL, optimize=False)
 
             self.status.emit(f"水印已移除: {output_filename}")
 
             # 移动原始文件到归档目录
-            archive_path = self.archive_dir / filename
+            # 一次性读取归档目录中的文件名，避免逐个 stat 检查是否重名
+            with os.scandir(self.archive_dir) as entries:
+                existing = {entry.name for entry in entries}
+
+            archive_name = filename
             counter = 1
 
             # 如果归档目录中已有同名文件，添加数字后缀
-            while archive_path.exists():
-                name_part = name_without_ext
-                archive_path = self.archive_dir / f"{name_part}_{counter}{ext}"
+            while archive_name in existing:
+                archive_name = f"{name_without_ext}_{counter}{ext}"
                 counter += 1
 
-            # 移动文件
-            shutil.move(file_path, str(archive_path))
+            archive_path = self.archive_dir / archive_name
+
+            # 移动文件（归档目录与源文件位于同一目录下，通常可直接原子重命名）
+            try:
+                os.replace(file_path, str(archive_path))
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(file_path, str(archive_path))
             self.status.emit(f"原始文件已归档: {archive_path.name}")
 
             # 发送处理完成信号
             self.file_processed.emit(file_path, output_path)
+            self.file_processed_named.emit(filename, output_filename)
 
         except Exception as e:
             logger.error(f"处理文件时出错 {file_path}: {e}", exc_info=True)
@@ -245,14 +285,20 @@ class FileMonitorThread(QThread):
         """运行监控线程"""
         if Observer is None:
             self.error.emit("未安装 watchdog 库，无法使用文件监控功能")
+            self.monitoring_stopped.emit()
             return
 
+        started = False
         try:
-            # 检查目录是否存在
-            if not os.path.exists(self.watch_dir):
+            # 检查目录是否存在（在监控线程中检查，避免慢速文件系统阻塞界面）
+            if not os.path.isdir(self.watch_dir):
                 self.error.emit(f"监控目录不存在: {self.watch_dir}")
+                self.monitoring_stopped.emit()
                 return
 
+            # 创建归档目录
+            self.archive_dir.mkdir(exist_ok=True)
+
             # 创建事件处理器
             handler = GeminiFileHandler(
                 callback=self._handle_new_file,
@@ -266,27 +312,29 @@ class FileMonitorThread(QThread):
 
             # 启动监控
             self.observer.start()
-            self.is_running = True
             self.monitoring_started.emit(self.watch_dir)
+            started = True
             self.status.emit(f"开始监控目录: {self.watch_dir}")
 
-            # 保持线程运行
-            while self.is_running:
-                self.msleep(100)
+            # 阻塞等待停止信号
+            self._stop_event.wait()
 
         except Exception as e:
             logger.error(f"监控线程错误: {e}", exc_info=True)
             self.error.emit(f"监控出错: {str(e)}")
+            # 启动阶段失败（如无权创建归档目录）时通知界面复位监控开关
+            if not started:
+                self.monitoring_stopped.emit()
         finally:
             if self.observer:
                 self.observer.stop()
-                self.observer.join()
+                if self.observer.is_alive():
+                    self.observer.join()
+            self._pool.shutdown(wait=True, cancel_futures=True)
 
     def stop(self):
         """停止监控"""
-        self.mutex.lock()
-        self.is_running = False
-        self.mutex.unlock()
+        self._stop_event.set()
         self.monitoring_stopped.emit()
         self.status.emit("监控已停止")
 
@@ -296,6 +344,7 @@ class GeminiFileMonitor(QObject):
 
     status = Signal(str)
     file_processed = Signal(str, str)
+    file_processed_named = Signal(str, str)
     error = Signal(str)
     monitoring_started = Signal(str)
     monitoring_stopped = Signal()
@@ -319,6 +368,7 @@ class GeminiFileMonitor(QObject):
         self.monitor_thread = FileMonitorThread(watch_dir, output_dir)
         self.monitor_thread.status.connect(self.status.emit)
         self.monitor_thread.file_processed.connect(self.file_processed.emit)
+        self.monitor_thread.file_processed_named.connect(self.file_processed_named.emit)
         self.monitor_thread.error.connect(self.error.emit)
         self.monitor_thread.monitoring_started.connect(self.monitoring_started.emit)
         self.monitor_thread.monitoring_stopped.connect(self.monitoring_stopped.emit)
@@ -331,8 +381,12 @@ class GeminiFileMonitor(QObject):
         if self.monitor_thread and self.monitor_thread.isRunning():
             self.monitor_thread.stop()
             self.monitor_thread.wait(3000)  # 等待最多3秒
-            self.is_monitoring = False
+        self.is_monitoring = False
 
     def is_running(self) -> bool:
-        """是否正在监控"""
-        return self.is_monitoring and self.monitor_thread is not None
+        """是否正在监控（监控线程可能因目录不存在等原因自行退出）"""
+        return (
+            self.is_monitoring
+            and self.monitor_thread is not None
+            and self.monitor_thread.isRunning()
+        )
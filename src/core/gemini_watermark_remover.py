@@ -12,8 +12,13 @@ Gemini AI 图片水印移除模块
 """
 
 import os
+import sys
 import logging
-from typing import Optional, Tuple, Dict, Any
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple, Dict, Any, Callable
 from pathlib import Path
 from datetime import datetime
 import numpy as np
@@ -22,6 +27,50 @@ from PySide6.QtCore import QObject, Signal, QThread, QMutex, QWaitCondition
 
 logger = logging.getLogger('GeminiWatermarkRemover.gemini_watermark_remover')
 
+# 打包后的程序每次启动都解压到新的临时目录，查找表的磁盘缓存不会命中
+_TABLE_CACHE = not getattr(sys, 'frozen', False)
+
+
+# numba 内核（可选）：导入 numba 和编译内核耗时较长，首次处理图片时才在后台线程中加载，
+# 加载完成前使用 NumPy 实现，两者输出一致
+_KERNELS: Optional[Dict[int, Callable]] = None
+_kernels_lock = threading.Lock()
+_kernels_loading = False
+
+
+def _load_kernels():
+    """导入并编译 numba 内核（后台线程中运行）"""
+    global _KERNELS
+    try:
+        from . import watermark_kernels
+    except ImportError:
+        _KERNELS = {}
+        return
+
+    try:
+        watermark_kernels.compile_kernels()
+    except Exception as e:
+        logger.warning(f"Failed to compile numba kernels, using NumPy: {e}")
+        _KERNELS = {}
+        return
+
+    _KERNELS = watermark_kernels.KERNELS
+    logger.debug("numba kernels ready")
+
+
+def _get_kernel(size: int) -> Optional[Callable]:
+    """获取指定尺寸的 numba 内核，尚未加载完成或不可用时返回 None"""
+    global _kernels_loading
+    if _KERNELS is None:
+        with _kernels_lock:
+            if not _kernels_loading:
+                _kernels_loading = True
+                threading.Thread(
+                    target=_load_kernels, name='GeminiWatermarkKernels'
+                ).start()
+        return None
+    return _KERNELS.get(size)
+
 
 class WatermarkConfig:
     """水印配置"""
@@ -97,6 +146,24 @@ def calculate_alpha_map(bg_image: Image.Image) -> np.ndarray:
     return alpha_map
 
 
+def image_to_array(image: Image.Image) -> np.ndarray:
+    """将 PIL Image 转换为可原地处理的 RGB 数组
+
+    Args:
+        image: PIL Image 对象（非 RGB 模式时在此处转换一次）
+
+    Returns:
+        C 连续、可写的 uint8 数组，形状为 (height, width, 3)
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # np.asarray 返回只读数组，原地修改需要一份可写拷贝
+    image_array = np.array(image, dtype=np.uint8, order='C')
+    assert image_array.flags['C_CONTIGUOUS']
+    return image_array
+
+
 class GeminiWatermarkRemover(QObject):
     """Gemini 水印移除引擎"""
 
@@ -108,13 +175,24 @@ class GeminiWatermarkRemover(QObject):
     ALPHA_THRESHOLD = 0.002
     MAX_ALPHA = 0.99
     LOGO_VALUE = 255  # 白色水印的 RGB 值
+    # 查找表推导方式的版本号，修改 _get_alpha_tables 中的计算公式时需递增，使磁盘缓存失效
+    ALPHA_TABLE_VERSION = 1
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._alpha_maps: Dict[int, np.ndarray] = {}
+        self._alpha_tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
         self._bg_images: Dict[int, Image.Image] = {}
         self._assets_dir = None
 
+        # 预先加载两种尺寸的查找表，处理时只需读取缓存（多线程下无需加锁）
+        for size in (48, 96):
+            try:
+                self._get_alpha_tables(size)
+            except FileNotFoundError as e:
+                # 资源缺失时推迟到处理图片时再报错
+                logger.warning(f"Failed to preload alpha tables for size {size}: {e}")
+
     def _get_assets_dir(self) -> Path:
         """获取资源目录路径"""
         if self._assets_dir is None:
@@ -173,10 +251,113 @@ class GeminiWatermarkRemover(QObject):
 
         return self._alpha_maps[size]
 
+    def _get_alpha_tables(self, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """获取指定尺寸的预计算查找表
+
+        将逆向公式改写为 original = watermarked * scale - offset，其中
+        scale = 1 / (1 - alpha)，offset = alpha * LOGO_VALUE / (1 - alpha)，
+        alpha 已按 MAX_ALPHA 截断。每个尺寸只计算一次，并缓存到资源目录下的
+        alpha_tables_{size}.npz，后续启动直接读取，无需再解码背景图。
+
+        Args:
+            size: 水印尺寸 (48 或 96)
+
+        Returns:
+            (scale, offset, mask) 元组，均为 (H, W) 的 C 连续数组，
+            mask 为 alpha >= ALPHA_THRESHOLD 的布尔数组
+        """
+        if size not in self._alpha_tables:
+            tables = self._load_cached_alpha_tables(size) if _TABLE_CACHE else None
+
+            if tables is None:
+                alpha_map = self.get_alpha_map(size)
+                alpha = np.minimum(alpha_map, self.MAX_ALPHA)
+                scale = 1.0 / (1.0 - alpha)
+                offset = alpha * self.LOGO_VALUE * scale
+                mask = alpha_map >= self.ALPHA_THRESHOLD
+                tables = (
+                    np.ascontiguousarray(scale, dtype=np.float32),
+                    np.ascontiguousarray(offset, dtype=np.float32),
+                    np.ascontiguousarray(mask)
+                )
+                logger.debug(f"Calculated alpha tables for size {size}")
+                if _TABLE_CACHE:
+                    self._save_cached_alpha_tables(size, tables)
+
+            self._alpha_tables[size] = tables
+
+        return self._alpha_tables[size]
+
+    def _alpha_table_params(self) -> np.ndarray:
+        """生成查找表所用的格式版本与常量，用于校验缓存是否过期"""
+        return np.array(
+            [self.ALPHA_TABLE_VERSION, self.ALPHA_THRESHOLD, self.MAX_ALPHA, self.LOGO_VALUE],
+            dtype=np.float64
+        )
+
+    def _load_cached_alpha_tables(self, size: int) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """读取磁盘上缓存的查找表
+
+        Args:
+            size: 水印尺寸 (48 或 96)
+
+        Returns:
+            (scale, offset, mask) 元组；缓存不存在、已过期或损坏时返回 None
+        """
+        assets_dir = self._get_assets_dir()
+        cache_path = assets_dir / f"alpha_tables_{size}.npz"
+        bg_path = assets_dir / f"bg_{size}.png"
+
+        try:
+            # 背景图比缓存新时重新计算
+            if cache_path.stat().st_mtime < bg_path.stat().st_mtime:
+                return None
+
+            with np.load(cache_path) as data:
+                if not np.array_equal(data['params'], self._alpha_table_params()):
+                    return None
+                tables = (data['scale'], data['offset'], data['mask'])
+        except Exception:
+            return None
+
+        # 形状或类型不符的缓存会导致内核越界，直接丢弃
+        expected_dtypes = (np.float32, np.float32, np.bool_)
+        for table, dtype in zip(tables, expected_dtypes):
+            if table.shape != (size, size) or table.dtype != dtype:
+                logger.warning(f"Ignoring malformed alpha table cache for size {size}")
+                return None
+
+        logger.debug(f"Loaded cached alpha tables for size {size}")
+        return tables
+
+    def _save_cached_alpha_tables(self, size: int, tables: Tuple[np.ndarray, np.ndarray, np.ndarray]):
+        """将查找表缓存到磁盘（资源目录不可写时忽略）
+
+        Args:
+            size: 水印尺寸 (48 或 96)
+            tables: (scale, offset, mask) 元组
+        """
+        assets_dir = self._get_assets_dir()
+        cache_path = assets_dir / f"alpha_tables_{size}.npz"
+        scale, offset, mask = tables
+
+        try:
+            # 先写入临时文件再替换，避免其他进程读到写了一半的缓存
+            fd, tmp_path = tempfile.mkstemp(dir=assets_dir, suffix='.npz')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, scale=scale, offset=offset, mask=mask, params=self._alpha_table_params())
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.debug(f"Failed to cache alpha tables for size {size}: {e}")
+
     def _remove_watermark_region(
         self,
         image_array: np.ndarray,
-        alpha_map: np.ndarray,
+        alpha_tables: Tuple[np.ndarray, np.ndarray, np.ndarray],
         position: Dict[str, int]
     ) -> np.ndarray:
         """移除指定区域的水印
@@ -185,41 +366,42 @@ class GeminiWatermarkRemover(QObject):
         original = (watermarked - alpha * LOGO_VALUE) / (1 - alpha)
 
         Args:
-            image_array: 图片 numpy 数组 (H, W, 3)
-            alpha_map: alpha map (H, W)
+            image_array: uint8 图片 numpy 数组 (H, W, 3)，原地修改
+            alpha_tables: _get_alpha_tables 返回的 (scale, offset, mask)
             position: 水印位置 {x, y, width, height}
 
         Returns:
             处理后的图片数组
         """
         x, y, width, height = position['x'], position['y'], position['width'], position['height']
-
-        # 提取水印区域
-        watermark_region = image_array[y:y + height, x:x + width].copy()
-
-        # 遍历每个像素进行恢复
-        for row in range(height):
-            for col in range(width):
-                alpha = alpha_map[row, col]
-
-                # 跳过 alpha 值太小的像素（基本没有水印）
-                if alpha < self.ALPHA_THRESHOLD:
-                    continue
-
-                # 限制 alpha 最大值，避免除零错误
-                alpha = min(alpha, self.MAX_ALPHA)
-                one_minus_alpha = 1.0 - alpha
-
-                # 对每个颜色通道应用逆向公式
-                for c in range(3):  # RGB 三个通道
-                    watermarked = watermark_region[row, col, c]
-                    # original = (watermarked - alpha * 255) / (1 - alpha)
-                    original = (watermarked - alpha * self.LOGO_VALUE) / one_minus_alpha
-                    # 限制到 [0, 255] 范围
-                    watermark_region[row, col, c] = np.clip(original, 0, 255)
+        scale, offset, mask = alpha_tables
+
+        # 提取水印区域（视图，写入直接作用于原图；跨步视图同样适用，无需复制整张图片）
+        watermark_region = image_array[y:y + height, x:x + width]
+
+        # 将交错的 RGB 拆分为三个连续的通道平面 (3, H, W)，使内层运算为单位步长
+        planes = np.ascontiguousarray(watermark_region.transpose(2, 0, 1))
+
+        # 按实际切出的区域形状选择内核：内核循环边界固定且不做越界检查，
+        # 区域与查找表形状不符时交由 NumPy 路径处理（会抛出 ValueError）
+        size = planes.shape[1]
+        kernel = _get_kernel(size)
+        if kernel is not None and planes.shape == (3, size, size) and scale.shape == (size, size):
+            # 已安装 numba 时使用对应尺寸的编译内核，无中间数组
+            kernel(planes, scale, offset, mask)
+        else:
+            # 只将水印区域提升为 float32，对三个通道平面同时应用逆向公式
+            original = planes.astype(np.float32)
+            original *= scale
+            original -= offset
+
+            # 四舍五入并限制到 [0, 255] 范围
+            np.rint(original, out=original)
+            np.clip(original, 0, 255, out=original)
+            np.copyto(planes, original, casting='unsafe', where=mask)
 
         # 将处理后的区域写回原图
-        image_array[y:y + height, x:x + width] = watermark_region
+        watermark_region[...] = planes.transpose(1, 2, 0)
 
         return image_array
 
@@ -240,12 +422,8 @@ class GeminiWatermarkRemover(QObject):
         self.status.emit(f"正在加载图片: {os.path.basename(input_path)}")
 
         with Image.open(input_path) as img:
-            # 转换为 RGB（如果不是的话）
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
             # 处理图片
-            result_img = self.remove_from_image(img)
+            result_img = self.remove_from_pil(img)
 
             # 确定输出路径
             if output_path is None:
@@ -258,47 +436,93 @@ class GeminiWatermarkRemover(QObject):
 
         return output_path
 
-    def remove_from_image(self, image: Image.Image) -> Image.Image:
-        """从 PIL Image 对象中移除水印
+    def _locate_watermark(
+        self,
+        width: int,
+        height: int
+    ) -> Tuple[Dict[str, int], Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """检测水印位置并获取对应的 alpha 查找表
 
         Args:
-            image: PIL Image 对象
+            width: 图片宽度
+            height: 图片高度
 
         Returns:
-            移除水印后的 PIL Image 对象
+            (水印位置, alpha 查找表) 元组；水印区域超出图片范围时抛出 ValueError
         """
-        width, height = image.size
-
-        # 确保图片是 RGB 格式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # 转换为 numpy 数组进行处理
-        image_array = np.array(image).astype(np.float32)
-
         # 检测水印配置
         config = detect_watermark_config(width, height)
 
         # 计算水印位置
         position = calculate_watermark_position(width, height, config)
 
+        # 图片过小时水印区域会超出图片范围，负坐标切片会得到错误的区域
+        if position['x'] < 0 or position['y'] < 0:
+            raise ValueError(
+                f"Image size {width}x{height} is too small for a "
+                f"{config.logo_size}px watermark"
+            )
+
         self.status.emit(
             f"检测到水印配置: {config.logo_size}px, "
             f"位置: ({position['x']}, {position['y']})"
         )
 
-        # 获取对应的 alpha map
-        alpha_map = self.get_alpha_map(config.logo_size)
+        # 获取对应的 alpha 查找表
+        return position, self._get_alpha_tables(config.logo_size)
+
+    def remove_from_pil(self, image: Image.Image) -> Image.Image:
+        """从 PIL Image 对象中移除水印
+
+        Pillow 的 RGB 图像内部按每像素 4 字节存储，与 numpy 之间无法零拷贝共享内存，
+        因此只将水印区域裁剪为数组处理后贴回，整张图片只复制一次。
+
+        Args:
+            image: PIL Image 对象（任意模式，内部只转换一次）
+
+        Returns:
+            移除水印后的 PIL Image 对象
+        """
+        # convert 本身会生成新图片，已是 RGB 时复制一份以免修改输入
+        result_image = image.convert('RGB') if image.mode != 'RGB' else image.copy()
+
+        position, alpha_tables = self._locate_watermark(*result_image.size)
+        x, y = position['x'], position['y']
+        box = (x, y, x + position['width'], y + position['height'])
+
+        region = image_to_array(result_image.crop(box))
 
         # 移除水印
         self.status.emit("正在移除水印...")
-        result_array = self._remove_watermark_region(image_array, alpha_map, position)
-
-        # 转换回 PIL Image
-        result_image = Image.fromarray(result_array.astype(np.uint8))
+        region_position = {'x': 0, 'y': 0, 'width': position['width'], 'height': position['height']}
+        region = self._remove_watermark_region(region, alpha_tables, region_position)
 
+        result_image.paste(Image.fromarray(region), (x, y))
         return result_image
 
+    def remove_from_image(self, image_array: np.ndarray) -> np.ndarray:
+        """从图片数组中移除水印
+
+        Args:
+            image_array: RGB 图片数组，uint8、可写（允许跨步视图），形状为 (H, W, 3)，
+                会被原地修改（可由 image_to_array 得到）
+
+        Returns:
+            移除水印后的图片数组
+        """
+        if image_array.dtype != np.uint8:
+            raise ValueError(f"Expected a uint8 image array, got {image_array.dtype}")
+        if image_array.ndim != 3 or image_array.shape[2] != 3:
+            raise ValueError(f"Expected an RGB image array of shape (H, W, 3), got {image_array.shape}")
+
+        height, width = image_array.shape[:2]
+
+        position, alpha_tables = self._locate_watermark(width, height)
+
+        # 移除水印
+        self.status.emit("正在移除水印...")
+        return self._remove_watermark_region(image_array, alpha_tables, position)
+
     def get_watermark_info(self, image_width: int, image_height: int) -> Dict[str, Any]:
         """获取水印信息（用于调试）
 
@@ -342,6 +566,11 @@ class GeminiWatermarkRemover(QObject):
             return False
 
 
+# 输出格式与扩展名的对应关系
+_FORMAT_TO_EXT = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+_EXT_TO_FORMAT = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
 class GeminiWatermarkThread(QThread):
     """Gemini 水印移除线程"""
     progress = Signal(int)
@@ -350,6 +579,12 @@ class GeminiWatermarkThread(QThread):
     error = Signal(str)
     overwrite_request = Signal(str)
 
+    # PNG 为无损格式，压缩级别只影响文件大小与编码耗时
+    # 去水印只改动极小区域，使用 zlib 最快档即可，高压缩级别几乎是纯 CPU 浪费
+    PNG_COMPRESS_LEVEL = 1
+    # WEBP 编码速度档位 (0-6)，6 为最慢最小，4 的体积相差很小但编码快数倍
+    WEBP_METHOD = 4
+
     def __init__(
         self,
         image_files: list,
@@ -364,10 +599,18 @@ class GeminiWatermarkThread(QThread):
         self.quality = quality
 
         self.mutex = QMutex()
+        self.overwrite_mutex = QMutex()
         self.wait_condition = QWaitCondition()
         self.overwrite_allowed = True
         self.waiting_for_response = False
 
+        # 各输出格式的编码参数，保持原格式与指定格式共用
+        self._save_options = {
+            'JPEG': {'quality': quality, 'optimize': True},
+            'PNG': {'compress_level': self.PNG_COMPRESS_LEVEL},
+            'WEBP': {'quality': quality, 'method': self.WEBP_METHOD},
+        }
+
         # 获取水印移除器实例
         self.remover = GeminiWatermarkRemover()
 
@@ -379,115 +622,146 @@ class GeminiWatermarkThread(QThread):
             self.wait_condition.wakeAll()
         self.mutex.unlock()
 
+    def _confirm_overwrite(self, output_path: str) -> bool:
+        """请求 UI 确认是否覆盖已存在的文件（多个工作线程时逐个询问）"""
+        self.overwrite_mutex.lock()
+        try:
+            self.mutex.lock()
+            self.waiting_for_response = True
+            self.overwrite_request.emit(output_path)
+            self.wait_condition.wait(self.mutex)
+            self.waiting_for_response = False
+            allowed = self.overwrite_allowed
+            self.mutex.unlock()
+            return allowed
+        finally:
+            self.overwrite_mutex.unlock()
+
+    def _process_one(
+        self,
+        filepath: str,
+        i: int,
+        total: int,
+        timestamp: str,
+        duplicate_names: set
+    ) -> Tuple[Optional[dict], Optional[tuple]]:
+        """处理单个文件
+
+        Args:
+            filepath: 图片路径
+            i: 文件序号
+            total: 文件总数
+            timestamp: 本批次共用的时间戳
+            duplicate_names: 本批次中重名的文件名（不含扩展名）
+
+        Returns:
+            (结果字典, 失败信息) 元组；跳过的文件两者均为 None
+        """
+        self.status.emit(f"正在处理 {i+1}/{total}: {os.path.basename(filepath)}")
+
+        # 验证文件存在（单次 stat 同时获取大小）
+        try:
+            file_stat = os.stat(filepath)
+        except FileNotFoundError:
+            logger.error(f"File not found: {filepath}")
+            return None, (filepath, "文件不存在")
+
+        # 验证文件大小
+        if file_stat.st_size == 0:
+            logger.error(f"File is empty: {filepath}")
+            return None, (filepath, "文件为空")
+
+        # 确定输出路径
+        filename = os.path.basename(filepath)
+        name, ext = os.path.splitext(filename)
+
+        # 保持原始格式或使用指定格式
+        if self.output_format:
+            ext = _FORMAT_TO_EXT.get(self.output_format, ext)
+
+        # 同一批次共用时间戳，重名文件追加序号避免互相覆盖
+        if name in duplicate_names:
+            name = f"{name}_{i}"
+        output_filename = f"{name}_no_watermark_{timestamp}{ext}"
+        output_path = os.path.join(self.output_dir, output_filename)
+
+        # 检查文件是否存在
+        if os.path.lexists(output_path):
+            if not self._confirm_overwrite(output_path):
+                return None, None
+
+        # 处理图片
+        try:
+            # 尝试打开图片，支持多种格式
+            img = None
+            try:
+                img = Image.open(filepath)
+            except Exception as e:
+                # 如果直接打开失败，尝试使用不同的格式
+                error_msg = str(e)
+                if "unrecognized" in error_msg or "cannot identify" in error_msg:
+                    # 文件格式可能不正确或损坏
+                    logger.error(f"Failed to open image {filepath}: {e}")
+                    return None, (filepath, f"图片格式无法识别: {error_msg}")
+                else:
+                    raise
+
+            # 移除水印（仅水印区域会转换为数组）
+            result_img = self.remover.remove_from_pil(img)
+            img.close()
+
+            # 保存结果（格式只解析一次，未知扩展名交由 Pillow 自行推断）
+            fmt = self.output_format or _EXT_TO_FORMAT.get(ext.lower())
+            save_options = self._save_options.get(fmt)
+            if save_options is not None:
+                result_img.save(output_path, fmt, **save_options)
+            else:
+                result_img.save(output_path)
+
+            return {
+                'input': filepath,
+                'output': output_path,
+                'file_size': os.path.getsize(output_path)
+            }, None
+
+        except Exception as e:
+            logger.error(f"Failed to process {filepath}: {e}", exc_info=True)
+            return None, (filepath, str(e))
+
     def run(self) -> None:
         try:
             results: list = []
             failed_files: list = []
             total = len(self.image_files)
 
-            for i, filepath in enumerate(self.image_files):
-                self.status.emit(f"正在处理 {i+1}/{total}: {os.path.basename(filepath)}")
-
-                # 验证文件存在
-                if not os.path.exists(filepath):
-                    logger.error(f"File not found: {filepath}")
-                    failed_files.append((filepath, "文件不存在"))
-                    continue
-
-                # 验证文件大小
-                if os.path.getsize(filepath) == 0:
-                    logger.error(f"File is empty: {filepath}")
-                    failed_files.append((filepath, "文件为空"))
-                    continue
-
-                # 确定输出路径
-                filename = os.path.basename(filepath)
-                name, ext = os.path.splitext(filename)
-
-                # 保持原始格式或使用指定格式
-                if self.output_format:
-                    format_ext_map = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
-                    ext = format_ext_map.get(self.output_format, ext)
-
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                output_filename = f"{name}_no_watermark_{timestamp}{ext}"
-                output_path = os.path.join(self.output_dir, output_filename)
-
-                # 检查文件是否存在
-                if os.path.exists(output_path):
-                    self.mutex.lock()
-                    self.waiting_for_response = True
-                    self.overwrite_request.emit(output_path)
-                    self.wait_condition.wait(self.mutex)
-                    self.waiting_for_response = False
-                    self.mutex.unlock()
-                    if not self.overwrite_allowed:
-                        continue
-
-                # 处理图片
-                try:
-                    # 尝试打开图片，支持多种格式
-                    img = None
-                    try:
-                        img = Image.open(filepath)
-                    except Exception as e:
-                        # 如果直接打开失败，尝试使用不同的格式
-                        error_msg = str(e)
-                        if "unrecognized" in error_msg or "cannot identify" in error_msg:
-                            # 文件格式可能不正确或损坏
-                            logger.error(f"Failed to open image {filepath}: {e}")
-                            failed_files.append((filepath, f"图片格式无法识别: {error_msg}"))
-                            continue
-                        else:
-                            raise
-
-                    # 转换为 RGB
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-
-                    # 移除水印
-                    result_img = self.remover.remove_from_image(img)
-
-                    # 关闭原始图片
-                    img.close()
-
-                    # 计算压缩级别（针对 PNG）
-                    # 质量 100 → compress_level 0（无压缩）
-                    # 质量 1 → compress_level 9（最大压缩）
-                    compress_level = max(0, min(9, int((100 - self.quality) / 10)))
-
-                    # 保存结果
-                    if self.output_format == 'JPEG':
-                        result_img.save(output_path, 'JPEG', quality=self.quality, optimize=True)
-                    elif self.output_format == 'PNG':
-                        # compress_level: 0=无压缩(最大质量), 9=最大压缩(最小文件)
-                        result_img.save(output_path, 'PNG', compress_level=compress_level)
-                    elif self.output_format == 'WEBP':
-                        result_img.save(output_path, 'WEBP', quality=self.quality, method=6)
-                    else:
-                        # 保持原格式时也需要设置质量参数
-                        ext_lower = ext.lower()
-                        if ext_lower in ('.jpg', '.jpeg'):
-                            result_img.save(output_path, 'JPEG', quality=self.quality, optimize=True)
-                        elif ext_lower == '.png':
-                            result_img.save(output_path, 'PNG', compress_level=compress_level)
-                        elif ext_lower == '.webp':
-                            result_img.save(output_path, 'WEBP', quality=self.quality, method=6)
-                        else:
-                            result_img.save(output_path)
-
-                    results.append({
-                        'input': filepath,
-                        'output': output_path,
-                        'file_size': os.path.getsize(output_path)
-                    })
-
-                except Exception as e:
-                    logger.error(f"Failed to process {filepath}: {e}", exc_info=True)
-                    failed_files.append((filepath, str(e)))
-                    continue
-
-                self.progress.emit(int((i + 1) / total * 100))
+            # 同一批次的输出共用一个时间戳，便于归组
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            name_counts = Counter(
+                os.path.splitext(os.path.basename(filepath))[0] for filepath in self.image_files
+            )
+            duplicate_names = {name for name, count in name_counts.items() if count > 1}
+
+            # 各文件相互独立，使用线程池并行处理（NumPy/Pillow 计算时会释放 GIL）
+            max_workers = max(1, min(os.cpu_count() or 1, total))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self._process_one, filepath, i, total, timestamp, duplicate_names)
+                    for i, filepath in enumerate(self.image_files)
+                ]
+
+                # 仅在整数百分比变化时发送进度，避免大批量时频繁跨线程刷新界面
+                last_percent = -1
+                for done, future in enumerate(as_completed(futures), 1):
+                    result, failure = future.result()
+                    if result:
+                        results.append(result)
+                    if failure:
+                        failed_files.append(failure)
+
+                    percent = done * 100 // total
+                    if percent != last_percent:
+                        self.progress.emit(percent)
+                        last_percent = percent
 
             # 如果有失败的文件，在结果中包含错误信息
             if failed_files:
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+水印区域的 numba 编译内核（可选）
+
+导入本模块会加载 numba，耗时较长，由 gemini_watermark_remover 在首次处理图片时
+于后台线程中导入，未安装 numba 时导入失败并回退到 NumPy 实现。
+"""
+
+import sys
+
+import numpy as np
+from numba import njit
+
+# 打包后的程序无法写入 JIT 缓存
+_JIT_CACHE = not getattr(sys, 'frozen', False)
+
+
+# 不启用 parallel：批量处理已按文件并行，numba 的 workqueue 线程层不支持多线程并发调用
+# 不启用 fastmath：乘减会被合并为 FMA，舍入结果与 NumPy 路径不一致
+@njit(inline='always', cache=_JIT_CACHE)
+def _apply_kernel(planes, scale, offset, mask, height, width):
+    """融合的逆向公式内核，逐通道平面单次遍历原地写回"""
+    for c in range(3):
+        plane = planes[c]
+        for row in range(height):
+            for col in range(width):
+                if mask[row, col]:
+                    # 与 NumPy 路径保持一致：float32 运算，rint 四舍六入五成双
+                    v = np.float32(plane[row, col]) * scale[row, col] - offset[row, col]
+                    if v < 0:
+                        plane[row, col] = 0
+                    elif v > 255:
+                        plane[row, col] = 255
+                    else:
+                        plane[row, col] = np.uint8(np.rint(v))
+
+
+# 水印只有 48 和 96 两种尺寸，为每种尺寸内联生成常量循环边界的内核，便于 LLVM 展开
+@njit(cache=_JIT_CACHE)
+def _kernel_48(planes, scale, offset, mask):
+    _apply_kernel(planes, scale, offset, mask, 48, 48)
+
+
+@njit(cache=_JIT_CACHE)
+def _kernel_96(planes, scale, offset, mask):
+    _apply_kernel(planes, scale, offset, mask, 96, 96)
+
+
+KERNELS = {48: _kernel_48, 96: _kernel_96}
+
+
+def compile_kernels():
+    """用空数组调用一次各内核，触发编译（或从缓存加载）"""
+    for size, kernel in KERNELS.items():
+        kernel(
+            np.zeros((3, size, size), dtype=np.uint8),
+            np.ones((size, size), dtype=np.float32),
+            np.zeros((size, size), dtype=np.float32),
+            np.zeros((size, size), dtype=np.bool_)
+        )
@@ -5,9 +5,12 @@
 """
 
 import os
+import stat
+from functools import partial
+from typing import Optional, Tuple
 from PIL import Image
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QThreadPool
 from PySide6.QtGui import QDragEnterEvent, QDropEvent
 from qfluentwidgets import (
     ScrollArea, SimpleCardWidget, BodyLabel, CaptionLabel,
@@ -15,13 +18,34 @@ from qfluentwidgets import (
 )
 
 
+class FileEntry:
+    """文件条目（缓存文件大小和图片尺寸，刷新列表时无需再访问磁盘）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.loaded = False
+        self.size: Optional[int] = None
+        self.dimensions: Optional[Tuple[int, int]] = None
+
+
 class FileListWidget(QWidget):
     """文件列表组件"""
     files_changed = Signal(list)  # 文件列表变化信号
+    _file_info_loaded = Signal(str, object, object)  # 路径, 文件大小, 图片尺寸
+    _file_validated = Signal(int, str, bool)  # 拖放批次, 路径, 是否有效
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.image_files = []
+        self._entries = {}  # 路径 -> FileEntry
+        self._row_widgets = {}  # 路径 -> 列表行
+        self._size_labels = {}  # 路径 -> 大小标签
+        self._show_size = False
+        self._verify_cache = {}  # 路径 -> (修改时间, 文件大小, 是否有效)
+        self._pending_drops = {}  # 拖放批次 -> 待验证状态
+        self._drop_batch_id = 0
+        self._file_info_loaded.connect(self._on_file_info_loaded)
+        self._file_validated.connect(self._on_file_validated)
         self.setAcceptDrops(True)
         self.setup_ui()
 
@@ -72,23 +96,67 @@ class FileListWidget(QWidget):
 
     def dropEvent(self, event: QDropEvent):
         files = [url.toLocalFile() for url in event.mimeData().urls()]
-        valid_files = []
-        invalid_files = []
+        candidates = []
 
         for file in files:
-            if os.path.isfile(file):
-                ext = os.path.splitext(file)[1].lower()
-                if ext in ['.png', '.jpg', '.jpeg', '.bmp', '.webp']:
-                    # 验证文件是否真的是有效的图片
-                    if self._is_valid_image(file):
-                        if file not in self.image_files:
-                            valid_files.append(file)
-                    else:
-                        invalid_files.append(os.path.basename(file))
+            ext = os.path.splitext(file)[1].lower()
+            if ext in ['.png', '.jpg', '.jpeg', '.bmp', '.webp'] and file not in self.image_files:
+                candidates.append(file)
+
+        if not candidates:
+            return
+
+        # 在线程池中验证图片，全部完成后再一次性添加到列表
+        self._drop_batch_id += 1
+        batch_id = self._drop_batch_id
+        self._pending_drops[batch_id] = {'files': candidates, 'remaining': len(candidates), 'valid': set()}
+
+        pool = QThreadPool.globalInstance()
+        for file in candidates:
+            pool.start(lambda f=file: self._file_validated.emit(batch_id, f, self._validate_file(f)))
+
+    def _validate_file(self, filepath):
+        """验证文件（在工作线程中执行，结果按修改时间和大小缓存）"""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False
+
+        if not stat.S_ISREG(st.st_mode):
+            return False
+
+        cached = self._verify_cache.get(filepath)
+        if cached is not None and cached[:2] == (st.st_mtime, st.st_size):
+            return cached[2]
+
+        valid = st.st_size > 0 and self._is_valid_image(filepath)
+        self._verify_cache[filepath] = (st.st_mtime, st.st_size, valid)
+        return valid
+
+    def _on_file_validated(self, batch_id, filepath, valid):
+        """单个文件验证完成"""
+        batch = self._pending_drops.get(batch_id)
+        if batch is None:
+            return
+
+        if valid:
+            batch['valid'].add(filepath)
+        batch['remaining'] -= 1
+        if batch['remaining'] > 0:
+            return
+
+        del self._pending_drops[batch_id]
+
+        # 保持拖入时的顺序
+        valid_files = [
+            f for f in batch['files']
+            if f in batch['valid'] and f not in self.image_files
+        ]
 
         if valid_files:
             self.image_files.extend(valid_files)
-            self.update_file_list()
+            self._load_file_info(valid_files)
+            self._add_rows(valid_files)
             self.files_changed.emit(self.image_files)
 
         # 可以添加提示告诉用户哪些文件无效（可选）
@@ -108,65 +176,120 @@ class FileListWidget(QWidget):
         except Exception:
             return False
 
-    def update_file_list(self, show_size=False):
-        """更新文件列表显示"""
-        while self.scroll_layout.count() > 0:
-            item = self.scroll_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        if not self.image_files:
-            self.empty_widget = QWidget()
-            empty_layout = QVBoxLayout(self.empty_widget)
-            empty_layout.setAlignment(Qt.AlignCenter)
-            empty_layout.setSpacing(12)
-
-            empty_icon = BodyLabel("📁")
-            empty_icon.setStyleSheet("font-size: 48px;")
-            empty_icon.setAlignment(Qt.AlignCenter)
-            empty_layout.addWidget(empty_icon)
-
-            empty_title = StrongBodyLabel("拖拽图片到此处")
-            empty_title.setAlignment(Qt.AlignCenter)
-            empty_layout.addWidget(empty_title)
-
-            self.scroll_layout.addWidget(self.empty_widget)
+    def _load_file_info(self, files):
+        """在线程池中读取文件大小和图片尺寸"""
+        pool = QThreadPool.globalInstance()
+        for filepath in files:
+            if filepath in self._entries:
+                continue
+            self._entries[filepath] = FileEntry(filepath)
+            pool.start(lambda f=filepath: self._read_file_info(f))
+
+    def _read_file_info(self, filepath):
+        """读取文件信息（在工作线程中执行）"""
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = None
+
+        try:
+            with Image.open(filepath) as img:
+                dimensions = img.size
+        except Exception:
+            dimensions = None
+
+        self._file_info_loaded.emit(filepath, size, dimensions)
+
+    def _on_file_info_loaded(self, filepath, size, dimensions):
+        """文件信息读取完成"""
+        entry = self._entries.get(filepath)
+        if entry is None:
             return
 
-        for filepath in self.image_files:
-            item_widget = SimpleCardWidget()
-            item_widget.setStyleSheet("SimpleCardWidget { border-radius: 6px; }")
-            item_layout = QHBoxLayout(item_widget)
-            item_layout.setContentsMargins(16, 10, 12, 10)
-
-            filename = os.path.basename(filepath)
-            name_label = BodyLabel(filename)
-            name_label.setToolTip(filepath)
-            item_layout.addWidget(name_label, 1)
-
-            # 显示文件大小或图片尺寸
-            if show_size:
-                try:
-                    with Image.open(filepath) as img:
-                        size_str = f"{img.width}×{img.height}"
-                except Exception:
-                    size_str = "未知"
-            else:
-                size = os.path.getsize(filepath)
-                size_str = self.format_size(size)
-
-            size_label = CaptionLabel(size_str)
-            size_label.setStyleSheet("color: #888;")
-            item_layout.addWidget(size_label)
-
-            del_btn = TransparentToolButton(FluentIcon.CLOSE)
-            del_btn.setFixedSize(28, 28)
-            del_btn.clicked.connect(lambda checked, f=filepath: self.remove_file(f))
-            item_layout.addWidget(del_btn)
-
-            self.scroll_layout.addWidget(item_widget)
-
-        self.scroll_layout.addStretch()
+        entry.loaded = True
+        entry.size = size
+        entry.dimensions = dimensions
+
+        label = self._size_labels.get(filepath)
+        if label is not None:
+            label.setText(self._size_text(entry))
+
+    def _size_text(self, entry):
+        """文件大小或图片尺寸的显示文本"""
+        if not entry.loaded:
+            return "…"
+        if self._show_size:
+            if entry.dimensions is None:
+                return "未知"
+            return f"{entry.dimensions[0]}×{entry.dimensions[1]}"
+        if entry.size is None:
+            return "未知"
+        return self.format_size(entry.size)
+
+    def update_file_list(self, show_size=False):
+        """重建文件列表显示"""
+        self._show_size = show_size
+
+        # 批量增删行期间暂停重绘，结束后统一布局一次
+        self.scroll_widget.setUpdatesEnabled(False)
+        try:
+            for row_widget in self._row_widgets.values():
+                self.scroll_layout.removeWidget(row_widget)
+                row_widget.deleteLater()
+            self._row_widgets.clear()
+            self._size_labels.clear()
+
+            self._add_rows(self.image_files)
+        finally:
+            self.scroll_widget.setUpdatesEnabled(True)
+
+    def _add_rows(self, files):
+        """为新文件追加列表行"""
+        for filepath in files:
+            row_widget = self._create_row(filepath)
+            self._row_widgets[filepath] = row_widget
+            self.scroll_layout.addWidget(row_widget)
+
+        self.empty_widget.setVisible(not self.image_files)
+
+    def _remove_row(self, filepath):
+        """移除单个文件的列表行"""
+        row_widget = self._row_widgets.pop(filepath, None)
+        self._size_labels.pop(filepath, None)
+        if row_widget is not None:
+            self.scroll_layout.removeWidget(row_widget)
+            row_widget.deleteLater()
+
+        self.empty_widget.setVisible(not self.image_files)
+
+    def _create_row(self, filepath):
+        """创建单个文件的列表行"""
+        item_widget = SimpleCardWidget()
+        item_widget.setStyleSheet("SimpleCardWidget { border-radius: 6px; }")
+        item_layout = QHBoxLayout(item_widget)
+        item_layout.setContentsMargins(16, 10, 12, 10)
+
+        filename = os.path.basename(filepath)
+        name_label = BodyLabel(filename)
+        name_label.setToolTip(filepath)
+        item_layout.addWidget(name_label, 1)
+
+        # 显示文件大小或图片尺寸（使用缓存，未读取完成时显示占位符）
+        size_label = CaptionLabel(self._size_text(self._entries[filepath]))
+        size_label.setStyleSheet("color: #888;")
+        item_layout.addWidget(size_label)
+        self._size_labels[filepath] = size_label
+
+        del_btn = TransparentToolButton(FluentIcon.CLOSE)
+        del_btn.setFixedSize(28, 28)
+        del_btn.clicked.connect(partial(self._on_remove_clicked, filepath))
+        item_layout.addWidget(del_btn)
+
+        return item_widget
+
+    def _on_remove_clicked(self, filepath, checked=False):
+        """删除按钮点击"""
+        self.remove_file(filepath)
 
     def format_size(self, size):
         """格式化文件大小"""
@@ -181,12 +304,14 @@ class FileListWidget(QWidget):
         """移除文件"""
         if filepath in self.image_files:
             self.image_files.remove(filepath)
-            self.update_file_list()
+            self._entries.pop(filepath, None)
+            self._remove_row(filepath)
             self.files_changed.emit(self.image_files)
 
     def clear_files(self):
         """清空文件列表"""
         self.image_files.clear()
+        self._entries.clear()
         self.update_file_list()
         self.files_changed.emit(self.image_files)
 
@@ -197,5 +322,7 @@ class FileListWidget(QWidget):
     def set_files(self, files):
         """设置文件列表"""
         self.image_files = files.copy()
+        self._entries.clear()
+        self._load_file_info(self.image_files)
         self.update_file_list()
         self.files_changed.emit(self.image_files)
@@ -6,12 +6,26 @@
 
 from pathlib import Path
 from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QStackedWidget
+from PySide6.QtCore import Slot
 from PySide6.QtGui import QIcon
 from qfluentwidgets import Pivot, SegmentedWidget, FluentIcon
 
 from .pages.image_gemini_watermark_page import ImageGeminiWatermarkPage
 from .pages.file_monitor_page import FileMonitorPage
 
+# 窗口图标路径在导入时解析一次；QIcon 需在 QApplication 创建后构造，首次使用时缓存
+_ICON_PATH = Path(__file__).resolve().parent.parent.parent / "assets" / "icon.png"
+_ICON_EXISTS = _ICON_PATH.exists()
+_app_icon = None
+
+
+def _get_app_icon():
+    """获取共享的窗口图标，图标文件不存在时返回 None"""
+    global _app_icon
+    if _app_icon is None and _ICON_EXISTS:
+        _app_icon = QIcon(str(_ICON_PATH))
+    return _app_icon
+
 
 class MainWindow(QMainWindow):
     """主窗口"""
@@ -22,9 +36,9 @@ class MainWindow(QMainWindow):
         self.resize(900, 700)
 
         # 设置窗口图标
-        icon_path = Path(__file__).parent.parent.parent / "assets" / "icon.png"
-        if icon_path.exists():
-            self.setWindowIcon(QIcon(str(icon_path)))
+        app_icon = _get_app_icon()
+        if app_icon is not None:
+            self.setWindowIcon(app_icon)
 
         # 创建中心部件
         self.central_widget = QWidget()
@@ -50,25 +64,24 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget(self.central_widget)
         layout.addWidget(self.stacked_widget)
 
-        # 创建页面
+        # 创建页面（监控页面在首次切换时才创建）
         self.watermark_page = ImageGeminiWatermarkPage(self.central_widget)
-        self.monitor_page = FileMonitorPage(self.central_widget)
+        self.monitor_page = None
 
         # 添加页面到堆栈
         self.stacked_widget.addWidget(self.watermark_page)
-        self.stacked_widget.addWidget(self.monitor_page)
 
         # 添加导航项
         self.pivot.addItem(
             routeKey='watermark',
             text='批量处理',
-            onClick=lambda: self.switch_page('watermark'),
+            onClick=self._show_watermark,
             icon=FluentIcon.DOCUMENT
         )
         self.pivot.addItem(
             routeKey='monitor',
             text='实时监控',
-            onClick=lambda: self.switch_page('monitor'),
+            onClick=self._show_monitor,
             icon=FluentIcon.VIEW
         )
 
@@ -81,4 +94,17 @@ class MainWindow(QMainWindow):
         if route_key == 'watermark':
             self.stacked_widget.setCurrentWidget(self.watermark_page)
         elif route_key == 'monitor':
+            if self.monitor_page is None:
+                self.monitor_page = FileMonitorPage(self.central_widget)
+                self.stacked_widget.addWidget(self.monitor_page)
             self.stacked_widget.setCurrentWidget(self.monitor_page)
+
+    @Slot()
+    def _show_watermark(self):
+        """切换到批量处理页面"""
+        self.switch_page('watermark')
+
+    @Slot()
+    def _show_monitor(self):
+        """切换到实时监控页面"""
+        self.switch_page('monitor')
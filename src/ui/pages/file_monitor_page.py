@@ -5,13 +5,15 @@
 """
 
 import os
+import html
+import time
 from pathlib import Path
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QFileDialog
-from PySide6.QtCore import Qt, QSettings
+from PySide6.QtCore import Qt, QSettings, QTimer
 from qfluentwidgets import (
     TitleLabel, CaptionLabel, PushButton, PrimaryPushButton,
     CardWidget, LineEdit, BodyLabel, StrongBodyLabel,
-    InfoBar, InfoBarPosition, SwitchButton, ScrollArea
+    InfoBar, InfoBarPosition, SwitchButton, PlainTextEdit
 )
 
 from ...core.file_monitor import GeminiFileMonitor, ARCHIVE_FOLDER_NAME, FILE_PREFIX
@@ -20,9 +22,12 @@ from ...core.file_monitor import GeminiFileMonitor, ARCHIVE_FOLDER_NAME, FILE_PR
 class MonitorLogCard(CardWidget):
     """监控日志卡片"""
 
+    # 最多保留的日志条数
+    MAX_LOG_ENTRIES = 100
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.log_entries = []
+        self._scroll_pending = False
         self.setup_ui()
 
     def setup_ui(self):
@@ -38,56 +43,47 @@ class MonitorLogCard(CardWidget):
         title_layout.addStretch()
         layout.addLayout(title_layout)
 
-        # 日志区域（使用滚动区域）
-        self.scroll_area = ScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setMinimumHeight(200)
-        self.scroll_area.setMaximumHeight(300)
-        self.scroll_area.setStyleSheet("ScrollArea { border: 1px solid #e0e0e0; border-radius: 4px; }")
-
-        self.log_widget = QWidget()
-        self.log_layout = QVBoxLayout(self.log_widget)
-        self.log_layout.setContentsMargins(12, 12, 12, 12)
-        self.log_layout.setSpacing(8)
-        self.log_layout.addStretch()
-        self.scroll_area.setWidget(self.log_widget)
+        # 日志区域（单个只读文本框，按块追加，超出上限的旧日志自动丢弃）
+        self.log_view = PlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(self.MAX_LOG_ENTRIES)
+        self.log_view.setCenterOnScroll(False)
+        self.log_view.setMinimumHeight(200)
+        self.log_view.setMaximumHeight(300)
 
-        layout.addWidget(self.scroll_area)
+        layout.addWidget(self.log_view)
 
     def add_log(self, message: str, is_error: bool = False):
         """添加日志"""
-        label = CaptionLabel(message)
-        timestamp = QTime.currentTime().toString("hh:mm:ss")
-        label.setText(f"[{timestamp}] {message}")
-
-        if is_error:
-            label.setStyleSheet("color: #D13438;")
-        else:
-            label.setStyleSheet("color: #333;")
-
-        # 插入到 stretch 之前
-        self.log_layout.insertWidget(self.log_layout.count() - 1, label)
-
-        # 滚动到底部
-        QTimer.singleShot(50, self._scroll_to_bottom)
+        self.add_logs([(message, is_error)])
+
+    def add_logs(self, entries):
+        """批量添加日志
+
+        Args:
+            entries: (消息, 是否为错误) 元组的可迭代对象
+        """
+        timestamp = time.strftime("%H:%M:%S")
+        for message, is_error in entries:
+            color = "#D13438" if is_error else "#333"
+            self.log_view.appendHtml(
+                f'<span style="color: {color};">[{timestamp}] {html.escape(message)}</span>'
+            )
 
-        # 限制日志条数
-        if self.log_layout.count() > 100:
-            item = self.log_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        # 滚动到底部（连续添加日志时合并为一次滚动）
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(50, self._scroll_to_bottom)
 
     def _scroll_to_bottom(self):
         """滚动到底部"""
-        scrollbar = self.scroll_area.verticalScrollBar()
+        self._scroll_pending = False
+        scrollbar = self.log_view.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
     def clear_logs(self):
         """清空日志"""
-        while self.log_layout.count() > 1:
-            item = self.log_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.log_view.clear()
 
 
 class FileMonitorPage(QWidget):
@@ -97,6 +93,15 @@ class FileMonitorPage(QWidget):
         super().__init__(parent)
         self.monitor = GeminiFileMonitor()
         self.settings = QSettings("GeminiWatermarkRemover", "FileMonitor")
+        self._processed_n = 0
+
+        # 监控线程的信号可能在短时间内大量到达，先缓存再定时批量刷新到界面
+        self._pending_logs = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush_logs)
+
         self.setup_ui()
         self._connect_signals()
         self._load_settings()  # 加载保存的配置
@@ -104,7 +109,7 @@ class FileMonitorPage(QWidget):
     def _connect_signals(self):
         """连接信号"""
         self.monitor.status.connect(self.on_status_update)
-        self.monitor.file_processed.connect(self.on_file_processed)
+        self.monitor.file_processed_named.connect(self.on_file_processed)
         self.monitor.error.connect(self.on_error)
         self.monitor.monitoring_started.connect(self.on_monitoring_started)
         self.monitor.monitoring_stopped.connect(self.on_monitoring_stopped)
@@ -209,13 +214,18 @@ class FileMonitorPage(QWidget):
         status_label.setStyleSheet("color: #666;")
         status_group.addWidget(status_label)
 
+        # 样式只设置一次，状态切换时通过 state 动态属性选择颜色
         self.status_value = StrongBodyLabel("未启动")
+        self.status_value.setProperty("state", "idle")
         self.status_value.setStyleSheet("""
             StrongBodyLabel {
                 color: #999;
                 font-size: 18px;
                 font-weight: 600;
             }
+            StrongBodyLabel[state="running"] {
+                color: #107C10;
+            }
         """)
         status_group.addWidget(self.status_value)
 
@@ -244,6 +254,13 @@ class FileMonitorPage(QWidget):
 
         layout.addWidget(card)
 
+    def _set_status_state(self, state: str):
+        """切换状态标签的样式（不重新解析样式表）"""
+        self.status_value.setProperty("state", state)
+        style = self.status_value.style()
+        style.unpolish(self.status_value)
+        style.polish(self.status_value)
+
     def select_directory(self):
         """选择监控目录"""
         current_dir = self.dir_edit.text()
@@ -299,45 +316,45 @@ class FileMonitorPage(QWidget):
             return
 
         if checked:
-            # 开始监控
-            if not os.path.exists(watch_dir):
-                self.monitor_switch.setChecked(False)
-                InfoBar.error(
-                    title="错误",
-                    content="所选目录不存在",
-                    orient=Qt.Horizontal,
-                    isClosable=True,
-                    position=InfoBarPosition.TOP,
-                    duration=3000,
-                    parent=self
-                )
-                return
-
+            # 开始监控（目录是否存在由监控线程检查，失败时会发出 error 和 monitoring_stopped）
+            self._processed_n = 0
             self.processed_count.setText("0")
+            self._pending_logs.clear()
             self.log_card.clear_logs()
             self.monitor.start_monitoring(watch_dir)
         else:
             # 停止监控
             self.monitor.stop_monitoring()
 
+    def _queue_log(self, message: str, is_error: bool = False):
+        """缓存日志，由定时器统一刷新"""
+        self._pending_logs.append((message, is_error))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_logs(self):
+        """将缓存的日志和计数一次性刷新到界面"""
+        self.processed_count.setText(str(self._processed_n))
+
+        if self._pending_logs:
+            pending, self._pending_logs = self._pending_logs, []
+            self.log_card.add_logs(pending)
+
     def on_status_update(self, message: str):
         """状态更新"""
-        self.log_card.add_log(message)
+        self._queue_log(message)
 
-    def on_file_processed(self, original_path: str, processed_path: str):
-        """文件处理完成"""
-        # 更新计数
-        current = int(self.processed_count.text())
-        self.processed_count.setText(str(current + 1))
+    def on_file_processed(self, original_name: str, processed_name: str):
+        """文件处理完成（文件名已在监控线程中提取）"""
+        # 更新计数（标签在刷新时更新）
+        self._processed_n += 1
 
         # 添加日志
-        original_name = os.path.basename(original_path)
-        processed_name = os.path.basename(processed_path)
-        self.log_card.add_log(f"已处理: {original_name} -> {processed_name}")
+        self._queue_log(f"已处理: {original_name} -> {processed_name}")
 
     def on_error(self, error_msg: str):
         """错误处理"""
-        self.log_card.add_log(f"错误: {error_msg}", is_error=True)
+        self._queue_log(f"错误: {error_msg}", is_error=True)
 
         InfoBar.error(
             title="错误",
@@ -352,17 +369,11 @@ class FileMonitorPage(QWidget):
     def on_monitoring_started(self, watch_dir: str):
         """监控已启动"""
         self.status_value.setText("监控中")
-        self.status_value.setStyleSheet("""
-            StrongBodyLabel {
-                color: #107C10;
-                font-size: 18px;
-                font-weight: 600;
-            }
-        """)
+        self._set_status_state("running")
         self.dir_edit.setEnabled(False)
         self.browse_btn.setEnabled(False)
 
-        self.log_card.add_log(f"监控已启动: {watch_dir}")
+        self._queue_log(f"监控已启动: {watch_dir}")
 
         InfoBar.success(
             title="监控已启动",
@@ -377,17 +388,16 @@ class FileMonitorPage(QWidget):
     def on_monitoring_stopped(self):
         """监控已停止"""
         self.status_value.setText("未启动")
-        self.status_value.setStyleSheet("""
-            StrongBodyLabel {
-                color: #999;
-                font-size: 18px;
-                font-weight: 600;
-            }
-        """)
+        self._set_status_state("idle")
+
+        # 监控启动失败时开关仍为打开状态，静默复位
+        self.monitor_switch.blockSignals(True)
+        self.monitor_switch.setChecked(False)
+        self.monitor_switch.blockSignals(False)
         self.dir_edit.setEnabled(True)
         self.browse_btn.setEnabled(True)
 
-        self.log_card.add_log("监控已停止")
+        self._queue_log("监控已停止")
 
         InfoBar.info(
             title="监控已停止",
@@ -399,6 +409,3 @@ class FileMonitorPage(QWidget):
             parent=self
         )
 
-
-# 导入 QTime
-from PySide6.QtCore import QTime